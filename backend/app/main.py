@@ -2,17 +2,23 @@
 FastAPI バックエンドアプリケーション
 PDF帯置き換え処理のためのAPIエンドポイントを提供
 """
+import functools
 import io
-import json
 import logging
 import uuid
+import anyio
+import anyio.to_thread
+import orjson
 from fastapi import FastAPI, File, Form, UploadFile, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from typing import Optional
 
 from .models import BandSettings, ProcessResponse, ErrorResponse
 from .pdf_processor import PDFProcessor
+from .result_cache import ProcessedPDFCache
 
 # ログ設定
 logging.basicConfig(level=logging.INFO)
@@ -34,9 +40,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# リクエスト全体のサイズ上限（PDF 10MB + 画像 5MB + マルチパートの余裕分）
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+
+class RequestSizeLimitMiddleware:
+    """
+    本文が上限を超えるリクエストを413で拒否するASGIミドルウェア
+    
+    Content-Lengthが上限を超える場合は本文の受信前に拒否する。
+    Content-Lengthのないリクエスト（チャンク転送）は受信したバイト数を数え、
+    上限を超えた時点でマルチパートの解析（一時ファイルへのスプール）を打ち切る。
+    BaseHTTPMiddlewareと異なり、レスポンスはラップせずにそのまま送信する。
+    """
+    
+    message = "リクエストサイズが大きすぎます（最大16MB）"
+    
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.max_size = max_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_size:
+            response = ORJSONResponse(
+                status_code=413,
+                content=ErrorResponse(error=self.message, detail="413").model_dump()
+            )
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    # 本文の解析中に送出されたHTTPExceptionは、FastAPIがそのまま例外ハンドラーに渡す
+                    raise HTTPException(status_code=413, detail=self.message)
+            return message
+        
+        await self.app(scope, receive_limited, send)
+
+app.add_middleware(RequestSizeLimitMiddleware, max_size=MAX_REQUEST_SIZE)
+
 # PDF処理インスタンス
 pdf_processor = PDFProcessor()
 
+# 処理済みPDFのキャッシュ（最大64件・256MB）
+result_cache = ProcessedPDFCache(max_entries=64, max_bytes=256 * 1024 * 1024)
+
+# MuPDFはスレッドセーフではないため、MuPDFの処理は1スレッドずつ実行する
+# （イベントループ上で生成する必要があるため、最初の呼び出し時に作成）
+_mupdf_limiter: Optional[anyio.CapacityLimiter] = None
+
+async def _run_mupdf(func, *args, **kwargs):
+    """
+    MuPDFを使う同期処理をワーカースレッドで実行
+    
+    PDFの解析・帯置き換えの間もイベントループを塞がず、
+    他のリクエストのアップロード受信を続けられるようにする。
+    順番待ちのリクエストはスレッドを確保せずに待機するため、
+    アップロードの読み込みなどが使う共有のスレッドプールを埋めない。
+    """
+    global _mupdf_limiter
+    if _mupdf_limiter is None:
+        _mupdf_limiter = anyio.CapacityLimiter(1)
+    
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs), limiter=_mupdf_limiter
+    )
+
 @app.get("/")
 async def root():
     """ルートエンドポイント - ヘルスチェック"""
@@ -75,16 +154,11 @@ async def process_pdf(
         # PDFファイルの読み込み
         pdf_bytes = await pdf.read()
         
-        # PDFファイルの妥当性検証
-        is_valid, error_msg = pdf_processor.validate_pdf(pdf_bytes)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=error_msg)
-        
         # 設定データの解析
         try:
-            settings_data = json.loads(settings)
+            settings_data = orjson.loads(settings)
             band_settings = BandSettings(**settings_data)
-        except (json.JSONDecodeError, ValueError) as e:
+        except (orjson.JSONDecodeError, ValueError) as e:
             raise HTTPException(
                 status_code=400,
                 detail=f"設定データの形式が正しくありません: {e}"
@@ -98,33 +172,55 @@ async def process_pdf(
                     status_code=413,
                     detail="画像ファイルサイズが大きすぎます（最大5MB）"
                 )
-            
+        
             # サポートされている画像形式チェック
             if not replaceImage.content_type or not replaceImage.content_type.startswith('image/'):
                 raise HTTPException(
                     status_code=400,
                     detail="サポートされていないファイル形式です（画像ファイルのみ）"
                 )
-            
+        
             replace_image_bytes = await replaceImage.read()
         
-        # PDF処理実行
-        try:
-            processed_pdf_bytes = pdf_processor.process_pdf(
-                pdf_bytes=pdf_bytes,
-                height_mm=band_settings.height,
-                y_offset_mm=band_settings.yOffset,
-                background_color=band_settings.backgroundColor or "#ffffff",
-                text_content=band_settings.textContent,
-                text_color=band_settings.textColor or "#000000",
-                replace_image_bytes=replace_image_bytes
-            )
-        except Exception as e:
-            logger.error(f"PDF processing failed: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"PDF処理中にエラーが発生しました: {e}"
-            )
+        band_options = dict(
+            height_mm=band_settings.height,
+            y_offset_mm=band_settings.yOffset,
+            background_color=band_settings.backgroundColor or "#ffffff",
+            text_content=band_settings.textContent,
+            text_color=band_settings.textColor or "#000000",
+        )
+        
+        # 同じPDF・同じ設定の処理結果があれば再利用
+        cache_key = result_cache.make_key(
+            pdf_bytes, tuple(band_options.values()), replace_image_bytes
+        )
+        processed_pdf_bytes = result_cache.get(cache_key)
+        
+        if processed_pdf_bytes is None:
+            # PDFファイルの妥当性検証（開いたドキュメントを処理まで使い回す）
+            doc, error_msg = await _run_mupdf(pdf_processor.validate_and_open, pdf_bytes)
+            if doc is None:
+                raise HTTPException(status_code=400, detail=error_msg)
+            
+            # PDF処理実行
+            try:
+                processed_pdf_bytes = await _run_mupdf(
+                    pdf_processor.process_pdf,
+                    pdf_bytes=pdf_bytes,
+                    replace_image_bytes=replace_image_bytes,
+                    doc=doc,
+                    **band_options
+                )
+            except Exception as e:
+                logger.error(f"PDF processing failed: {e}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"PDF処理中にエラーが発生しました: {e}"
+                )
+            finally:
+                await _run_mupdf(doc.close)
+            
+            result_cache.put(cache_key, processed_pdf_bytes)
         
         # 処理済みPDFを返す
         output_filename = pdf.filename.replace('.pdf', '_modified.pdf') if pdf.filename else 'modified.pdf'
@@ -149,15 +245,21 @@ async def process_pdf(
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """HTTPエラーハンドラー"""
-    return ErrorResponse(error=exc.detail, detail=str(exc.status_code))
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content=ErrorResponse(error=exc.detail, detail=str(exc.status_code)).model_dump()
+    )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """一般的なエラーハンドラー"""
     logger.error(f"Unhandled exception: {exc}")
-    return ErrorResponse(
-        error="内部サーバーエラーが発生しました",
-        detail=str(exc)
+    return ORJSONResponse(
+        status_code=500,
+        content=ErrorResponse(
+            error="内部サーバーエラーが発生しました",
+            detail=str(exc)
+        ).model_dump()
     )
 
 if __name__ == "__main__":
@@ -2,14 +2,240 @@
 PDF処理モジュール
 PyMuPDFを使用してPDFの帯置き換え処理を実行
 """
+import functools
 import io
+import re
+from collections import defaultdict
 import fitz  # PyMuPDF
-from PIL import Image, ImageDraw, ImageFont
-from typing import Optional, Tuple
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 import logging
 
+from .result_cache import BytesLRUCache
+
 logger = logging.getLogger(__name__)
 
+class _BandImage(NamedTuple):
+    """ページに埋め込む帯画像（生のRGBバイト列、またはJPEGバイト列）"""
+    data: bytes
+    size: Tuple[int, int]  # 画像のピクセルサイズ(幅, 高さ)
+    is_jpeg: bool = False
+
+
+# "#rrggbb" / "#rgb"形式の色（int()が受け付ける符号・アンダースコア・空白は含めない）
+_HEX_COLOR = re.compile(r"#(?:[0-9a-fA-F]{3}){1,2}")
+
+
+def _hex_to_rgb(color: str) -> Tuple[int, int, int]:
+    """
+    "#rrggbb" / "#rgb"形式の色をRGBタプルに変換
+    
+    整数1回の変換とビットシフト・マスクで分解し、PILの色文字列パーサーを経由しない。
+    "#rgb"は各4ビットを0x11倍して8ビットに展開する。
+    それ以外の形式（色名など）はPILのImageColorにフォールバックし、
+    解釈できない場合はValueErrorとなる。
+    """
+    if _HEX_COLOR.fullmatch(color):
+        value = int(color[1:], 16)
+        if len(color) == 7:
+            return (value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff
+        return ((value >> 8) & 0xf) * 0x11, ((value >> 4) & 0xf) * 0x11, (value & 0xf) * 0x11
+    return ImageColor.getrgb(color)[:3]
+
+
+# 帯テキストに使用するフォントの候補（先に見つかったものを使用）
+FONT_CANDIDATES = (
+    "/System/Library/Fonts/Arial.ttf",  # macOS
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Linux（fonts-dejavu-core）
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _get_font(size: int) -> ImageFont.ImageFont:
+    """
+    指定サイズのフォントを取得
+    
+    TTFのパースは描画ごとに行わず、サイズごとに1回だけ行う。
+    候補が見つからない場合の結果（デフォルトフォント）もキャッシュされる。
+    """
+    for path in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(path, size)
+        except (OSError, IOError):
+            continue
+    
+    # フォントが見つからない場合はデフォルトフォントを使用
+    return ImageFont.load_default()
+
+
+# テキスト計測用のImageDraw（描画先の画像は使わないため1x1で十分）
+_measure_draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
+
+@functools.lru_cache(maxsize=512)
+def _measure_text(text: str, font_size: int) -> Tuple[int, int, int, int]:
+    """
+    テキストのバウンディングボックスを取得
+    
+    帯の高さが同じならフォントサイズも同じになるため、ページ幅の異なる帯でも
+    計測結果を使い回し、FreeTypeのレイアウトは描画時の1回だけにする。
+    draw.text()と同じく、改行を含むテキストは複数行として計測される。
+    """
+    return _measure_draw.textbbox((0, 0), text, font=_get_font(font_size))
+
+
+def _draw_band_image(width: int,
+                     height: int,
+                     background_color: str = "#ffffff",
+                     text_content: Optional[str] = None,
+                     text_color: str = "#000000") -> Image.Image:
+    """帯用の画像を描画（PDFProcessor.create_band_imageの実体）"""
+    # 新しい画像を作成
+    img = Image.new('RGB', (width, height), _hex_to_rgb(background_color))
+    
+    if text_content:
+        draw = ImageDraw.Draw(img)
+        
+        # フォントサイズを動的に調整
+        font_size = min(height // 3, 48)  # 高さに応じてフォントサイズを調整
+        
+        font = _get_font(font_size)
+        
+        # テキストのサイズを取得（同じテキスト・サイズの計測結果は再利用）
+        bbox = _measure_text(text_content, font_size)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
+        
+        # 中央に配置
+        x = (width - text_width) // 2
+        y = (height - text_height) // 2
+        
+        # テキストを描画
+        draw.text((x, y), text_content, fill=_hex_to_rgb(text_color), font=font)
+    
+    return img
+
+
+# 生成済みの帯画像（生のRGBバイト列）のキャッシュ
+# 1件あたり数百KB〜数MBになるため、件数に加えてバイト数でも上限を設ける
+_band_rgb_cache = BytesLRUCache(max_entries=32, max_bytes=32 * 1024 * 1024)
+
+
+def _render_band_rgb(width: int,
+                     height: int,
+                     background_color: str,
+                     text_content: Optional[str],
+                     text_color: str) -> bytes:
+    """
+    帯画像を描画し、そのままPixmapにできる生のRGBバイト列を返す
+    
+    同じ(幅, 高さ, 背景色, テキスト, テキスト色)の帯はリクエストやページを
+    またいで再利用されるため、PILによるラスタライズはキャッシュミス時のみ。
+    """
+    key = (width, height, background_color, text_content, text_color)
+    rgb = _band_rgb_cache.get(key)
+    if rgb is None:
+        rgb = _draw_band_image(
+            width, height, background_color, text_content, text_color
+        ).tobytes()
+        _band_rgb_cache.put(key, rgb)
+    return rgb
+
+
+def _flatten_rgba_on_white(image: Image.Image) -> Image.Image:
+    """
+    RGBA画像を白背景に合成してRGB画像に変換
+    
+    チャンネル分割とマスク付きpasteの代わりに、NumPyのベクトル演算で
+    out = (rgb * a + 255 * (255 - a)) / 255 を一括計算する。
+    """
+    arr = np.asarray(image, dtype=np.uint16)
+    rgb = arr[..., :3]
+    alpha = arr[..., 3:4]
+    out = ((rgb * alpha + 255 * (255 - alpha)) // 255).astype(np.uint8)
+    return Image.fromarray(out, 'RGB')
+
+
+def _is_photographic(image: Image.Image) -> bool:
+    """
+    写真のように色数の多い画像かを簡易判定
+    
+    8ピクセル間隔で間引いた画素の色数を数える。分散（標準偏差）は白地に
+    黒文字のバナーでも大きくなるため、単色・テキスト画像との区別には色数を使う。
+    """
+    # 間引きはNEARESTの縮小で行い、フルサイズの配列コピーを作らない
+    width, height = image.size
+    sample = image.resize((max(1, width // 8), max(1, height // 8)), Image.NEAREST)
+    arr = np.asarray(sample).astype(np.uint32)
+    packed = (arr[..., 0] << 16) | (arr[..., 1] << 8) | arr[..., 2]
+    return len(np.unique(packed)) > 256
+
+
+def _band_size(page_width: float, band_height_pt: float) -> Tuple[int, int]:
+    """ページ幅に合わせた帯画像のピクセルサイズ"""
+    return int(page_width), int(band_height_pt)
+
+
+def _group_pages_by_band_size(doc: fitz.Document,
+                              page_indices: List[int],
+                              band_height_pt: float) -> Dict[Tuple[int, int], List[int]]:
+    """
+    ページを帯画像のピクセルサイズごとにグループ化
+    
+    多くのPDFはページサイズが揃っているため、通常は1グループになる。
+    """
+    groups = defaultdict(list)
+    for page_num in page_indices:
+        groups[_band_size(doc.load_page(page_num).rect.width, band_height_pt)].append(page_num)
+    return groups
+
+
+def _insert_bands(doc: fitz.Document,
+                  page_groups: Dict[Tuple[int, int], List[int]],
+                  band_images: Dict[Tuple[int, int], _BandImage],
+                  band_height_pt: float,
+                  y_offset_pt: float) -> None:
+    """
+    指定ページの帯エリアを画像で置き換え
+    
+    PNGのエンコード/デコードを経由せず、生のRGBバイト列から作成した
+    Pixmapを直接挿入する（写真系の帯はJPEGをそのまま埋め込む）。
+    Pixmapは帯サイズのグループごとに1回だけ作成して1つの画像XObjectとして埋め込み、
+    グループ内の残りのページはそのXObjectを参照する。
+    
+    Args:
+        doc: 処理対象のPDFドキュメント
+        page_groups: 帯画像サイズごとのページ番号のリスト
+        band_images: 帯画像サイズごとの帯画像
+        band_height_pt: 帯の高さ（ポイント）
+        y_offset_pt: Y位置オフセット（ポイント）
+    """
+    for size, page_indices in page_groups.items():
+        band = band_images[size]
+        if band.is_jpeg:
+            # JPEGはMuPDFがデコードせずそのまま埋め込む
+            image_source = {'stream': band.data}
+        else:
+            # 生のRGBバイト列からPixmapを作成
+            width, height = band.size
+            image_source = {'pixmap': fitz.Pixmap(fitz.csRGB, width, height, band.data, False)}
+        
+        xref = 0
+        for page_num in page_indices:
+            page = doc.load_page(page_num)
+            
+            # 帯エリアの矩形を定義
+            band_rect = fitz.Rect(0, y_offset_pt, page.rect.width, y_offset_pt + band_height_pt)
+            
+            # 画像をPDFページに挿入（縦横比を保たず矩形全体を覆うため、下地の塗りつぶしは不要）
+            # 2ページ目以降は埋め込み済みの画像XObjectを参照するだけにする
+            if xref:
+                page.insert_image(band_rect, keep_proportion=False, xref=xref)
+            else:
+                xref = page.insert_image(band_rect, keep_proportion=False, **image_source)
+
+
 class PDFProcessor:
     """PDF処理クラス"""
     
@@ -43,35 +269,7 @@ class PDFProcessor:
         Returns:
             PIL Image object
         """
-        # 新しい画像を作成
-        img = Image.new('RGB', (width, height), background_color)
-        
-        if text_content:
-            draw = ImageDraw.Draw(img)
-            
-            # フォントサイズを動的に調整
-            font_size = min(height // 3, 48)  # 高さに応じてフォントサイズを調整
-            
-            try:
-                # システムフォントを使用（日本語対応）
-                font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", font_size)
-            except (OSError, IOError):
-                # フォントが見つからない場合はデフォルトフォントを使用
-                font = ImageFont.load_default()
-            
-            # テキストのサイズを取得
-            bbox = draw.textbbox((0, 0), text_content, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            
-            # 中央に配置
-            x = (width - text_width) // 2
-            y = (height - text_height) // 2
-            
-            # テキストを描画
-            draw.text((x, y), text_content, fill=text_color, font=font)
-        
-        return img
+        return _draw_band_image(width, height, background_color, text_content, text_color)
     
     def replace_band_with_image(self, 
                                pdf_bytes: bytes,
@@ -90,52 +288,95 @@ class PDFProcessor:
         Returns:
             処理済みPDFのバイト列
         """
-        # PDFを開く
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return self._replace_band(
+                doc, self._image_band_source(band_image), height_mm, y_offset_mm
+            )
+    
+    def _image_band_source(self,
+                           band_image: Image.Image,
+                           source_format: Optional[str] = None) -> Callable[[Tuple[int, int]], _BandImage]:
+        """
+        画像を帯サイズにリサイズして帯画像を返す関数を作成
         
-        try:
-            # 各ページを処理
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                
-                # ページサイズを取得
-                page_rect = page.rect
-                page_width = page_rect.width
-                page_height = page_rect.height
-                
-                # 帯の位置とサイズを計算（ポイント単位）
-                band_height_pt = self.mm_to_points(height_mm)
-                y_offset_pt = self.mm_to_points(y_offset_mm)
-                
-                # 帯エリアの矩形を定義
-                band_rect = fitz.Rect(0, y_offset_pt, page_width, y_offset_pt + band_height_pt)
-                
-                # 帯エリアを白で塗りつぶし（既存の内容を消去）
-                page.draw_rect(band_rect, color=(1, 1, 1), fill=(1, 1, 1))
-                
-                # 画像をリサイズ
-                band_image_resized = band_image.resize(
-                    (int(page_width), int(band_height_pt)), 
-                    Image.LANCZOS
-                )
-                
-                # PIL Imageをバイトストリームにエンコード
+        写真系の画像（元がJPEG、または色数が多い画像）はJPEGで、
+        単色やテキストの画像は生のRGBバイト列で埋め込む。
+        
+        リサイズにはBILINEARを使う。72DPIで埋め込む帯ではLANCZOSとの画質差は
+        ほぼ見分けられず、処理は数倍速い。縦横とも2ピクセル未満の差であれば
+        リサイズせず、そのまま帯の矩形に合わせて埋め込む。
+        
+        Args:
+            band_image: 置き換える画像
+            source_format: 元画像の形式（PILのformat、例: "JPEG"）
+            
+        Returns:
+            帯画像サイズ(幅, 高さ)から帯画像を生成する関数
+        """
+        # Pixmapは3チャンネルのRGBとして作成するため、モードを揃える
+        if band_image.mode != 'RGB':
+            band_image = band_image.convert('RGB')
+        
+        use_jpeg = source_format == 'JPEG' or _is_photographic(band_image)
+        
+        def band_image_for_size(size: Tuple[int, int]) -> _BandImage:
+            width, height = size
+            source_width, source_height = band_image.size
+            if abs(width - source_width) < 2 and abs(height - source_height) < 2:
+                band_image_resized = band_image
+            else:
+                # 大きく縮小する場合は整数倍の縮小を先に行ってからリサンプリング
+                band_image_resized = band_image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+            
+            if use_jpeg:
                 img_bytes = io.BytesIO()
-                band_image_resized.save(img_bytes, format='PNG')
-                img_bytes.seek(0)
-                
-                # 画像をPDFページに挿入
-                page.insert_image(band_rect, stream=img_bytes.getvalue())
-                
-            # 処理済みPDFをバイト列として返す
-            output_bytes = doc.tobytes()
+                band_image_resized.save(img_bytes, format='JPEG', quality=90, optimize=False)
+                return _BandImage(img_bytes.getvalue(), band_image_resized.size, is_jpeg=True)
+            return _BandImage(band_image_resized.tobytes(), band_image_resized.size)
+        
+        return band_image_for_size
+    
+    def _largest_band_size(self, doc: fitz.Document, height_mm: float) -> Tuple[int, int]:
+        """ドキュメント内で最大の帯画像サイズ(幅, 高さ)"""
+        return _band_size(max(page.rect.width for page in doc), self.mm_to_points(height_mm))
+    
+    def _replace_band(self,
+                      doc: fitz.Document,
+                      band_image_for_size: Callable[[Tuple[int, int]], _BandImage],
+                      height_mm: float,
+                      y_offset_mm: float) -> bytes:
+        """
+        PDFの帯エリアを、サイズごとに生成したRGB画像で置き換え
+        
+        Args:
+            doc: 元のPDFから開いたドキュメント（帯が書き込まれる）
+            band_image_for_size: 帯画像サイズ(幅, 高さ)から帯画像を生成する関数
+            height_mm: 帯の高さ（ミリメートル）
+            y_offset_mm: Y位置オフセット（ミリメートル）
+            
+        Returns:
+            処理済みPDFのバイト列
+        """
+        # 帯の位置とサイズを計算（ポイント単位）
+        band_height_pt = self.mm_to_points(height_mm)
+        y_offset_pt = self.mm_to_points(y_offset_mm)
+        
+        try:
+            page_count = len(doc)
+            
+            # 帯画像はページごとではなく、帯サイズのグループごとに一度だけ生成
+            page_groups = _group_pages_by_band_size(doc, list(range(page_count)), band_height_pt)
+            band_images = {size: band_image_for_size(size) for size in page_groups}
+            
+            _insert_bands(doc, page_groups, band_images, band_height_pt, y_offset_pt)
+            
+            # 処理済みPDFをバイト列として返す（埋め込んだ帯画像は非圧縮のため圧縮して保存）
+            output_bytes = doc.tobytes(deflate_images=True)
             return output_bytes
             
         except Exception as e:
             logger.error(f"PDF processing error: {e}")
             raise
-        finally:
-            doc.close()
     
     def replace_band_with_uploaded_image(self, 
                                        pdf_bytes: bytes,
@@ -154,18 +395,42 @@ class PDFProcessor:
         Returns:
             処理済みPDFのバイト列
         """
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            band_image, source_format = self._load_uploaded_image(
+                image_bytes, self._largest_band_size(doc, height_mm)
+            )
+            return self._replace_band(
+                doc, self._image_band_source(band_image, source_format),
+                height_mm, y_offset_mm
+            )
+    
+    def _load_uploaded_image(self,
+                             image_bytes: bytes,
+                             target_size: Optional[Tuple[int, int]] = None) -> Tuple[Image.Image, Optional[str]]:
+        """
+        アップロードされた画像を開き、(RGB画像, 元画像の形式)を返す
+        
+        画像のデコードはここで1回だけ行う。JPEGはtarget_size以上を保てる範囲で
+        縮小しながらデコードし、帯より大きな解像度での展開を避ける。
+        
+        Args:
+            image_bytes: アップロードされた画像のバイト列
+            target_size: 最大の帯画像サイズ(幅, 高さ)（オプション）
+        """
         # アップロードされた画像を開く
         band_image = Image.open(io.BytesIO(image_bytes))
+        source_format = band_image.format
         
-        # RGBA画像の場合、RGBに変換
+        if target_size is not None and source_format == 'JPEG':
+            band_image.draft('RGB', target_size)
+        
+        # RGBA画像の場合、白背景に合成してRGBに変換
         if band_image.mode == 'RGBA':
-            background = Image.new('RGB', band_image.size, (255, 255, 255))
-            background.paste(band_image, mask=band_image.split()[-1])
-            band_image = background
+            band_image = _flatten_rgba_on_white(band_image)
         elif band_image.mode != 'RGB':
             band_image = band_image.convert('RGB')
         
-        return self.replace_band_with_image(pdf_bytes, band_image, height_mm, y_offset_mm)
+        return band_image, source_format
     
     def process_pdf(self, 
                    pdf_bytes: bytes,
@@ -174,10 +439,14 @@ class PDFProcessor:
                    background_color: str = "#ffffff",
                    text_content: Optional[str] = None,
                    text_color: str = "#000000",
-                   replace_image_bytes: Optional[bytes] = None) -> bytes:
+                   replace_image_bytes: Optional[bytes] = None,
+                   doc: Optional[fitz.Document] = None) -> bytes:
         """
         PDFの帯置き換え処理のメインメソッド
         
+        validate_and_openで開いたドキュメントをdocに渡すと、PDFを再パースせずに処理する。
+        渡したドキュメントには帯が書き込まれるため、呼び出し側で閉じること。
+        
         Args:
             pdf_bytes: 元のPDFのバイト列
             height_mm: 帯の高さ（ミリメートル）
@@ -186,26 +455,85 @@ class PDFProcessor:
             text_content: テキスト内容
             text_color: テキスト色
             replace_image_bytes: 置き換える画像のバイト列（オプション）
+            doc: pdf_bytesから開いたドキュメント（オプション）
             
         Returns:
             処理済みPDFのバイト列
         """
+        if doc is None:
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                return self._process_doc(
+                    doc, height_mm, y_offset_mm, background_color,
+                    text_content, text_color, replace_image_bytes
+                )
+        
+        return self._process_doc(
+            doc, height_mm, y_offset_mm, background_color,
+            text_content, text_color, replace_image_bytes
+        )
+    
+    def _process_doc(self,
+                     doc: fitz.Document,
+                     height_mm: float,
+                     y_offset_mm: float,
+                     background_color: str,
+                     text_content: Optional[str],
+                     text_color: str,
+                     replace_image_bytes: Optional[bytes]) -> bytes:
+        """開いたドキュメントに対して帯置き換え処理を実行（引数はprocess_pdfと同じ）"""
         if replace_image_bytes:
             # アップロードされた画像で置き換え
-            return self.replace_band_with_uploaded_image(
-                pdf_bytes, replace_image_bytes, height_mm, y_offset_mm
+            band_image, source_format = self._load_uploaded_image(
+                replace_image_bytes, self._largest_band_size(doc, height_mm)
+            )
+            return self._replace_band(
+                doc, self._image_band_source(band_image, source_format),
+                height_mm, y_offset_mm
             )
+        elif not text_content:
+            # 単色の帯は画像を作らず、矩形の塗りつぶしのみで置き換え
+            return self._fill_band(doc, background_color, height_mm, y_offset_mm)
         else:
-            # 色とテキストで帯を生成
-            # 仮の幅（実際の処理では各ページの幅に合わせて調整）
-            temp_width = int(self.mm_to_points(210))  # A4幅
-            temp_height = int(self.mm_to_points(height_mm))
+            # 色とテキストで帯を生成（ページ幅に合わせて描画し、キャッシュを利用）
+            def band_image_for_size(size: Tuple[int, int]) -> _BandImage:
+                width, height = size
+                return _BandImage(_render_band_rgb(
+                    width, height, background_color, text_content, text_color
+                ), size)
             
-            band_image = self.create_band_image(
-                temp_width, temp_height, background_color, text_content, text_color
-            )
+            return self._replace_band(doc, band_image_for_size, height_mm, y_offset_mm)
+    
+    def _fill_band(self,
+                   doc: fitz.Document,
+                   background_color: str,
+                   height_mm: float,
+                   y_offset_mm: float) -> bytes:
+        """
+        PDFの帯エリアを単色で塗りつぶし
+        
+        PIL画像の生成や画像の埋め込みを行わず、PyMuPDFの矩形描画のみで処理する。
+        
+        Args:
+            doc: 元のPDFから開いたドキュメント（帯が書き込まれる）
+            background_color: 背景色
+            height_mm: 帯の高さ（ミリメートル）
+            y_offset_mm: Y位置オフセット（ミリメートル）
             
-            return self.replace_band_with_image(pdf_bytes, band_image, height_mm, y_offset_mm)
+        Returns:
+            処理済みPDFのバイト列
+        """
+        # 帯の位置とサイズを計算（ポイント単位）
+        band_height_pt = self.mm_to_points(height_mm)
+        y_offset_pt = self.mm_to_points(y_offset_mm)
+        
+        # 背景色をPyMuPDFの0〜1の値に変換
+        fill = tuple(c / 255 for c in _hex_to_rgb(background_color))
+        
+        for page in doc:
+            band_rect = fitz.Rect(0, y_offset_pt, page.rect.width, y_offset_pt + band_height_pt)
+            page.draw_rect(band_rect, color=fill, fill=fill, overlay=True)
+        
+        return doc.tobytes()
     
     def validate_pdf(self, pdf_bytes: bytes) -> Tuple[bool, str]:
         """
@@ -217,17 +545,37 @@ class PDFProcessor:
         Returns:
             (妥当性, エラーメッセージ)
         """
+        doc, error_msg = self.validate_and_open(pdf_bytes)
+        if doc is None:
+            return False, error_msg
+        
+        doc.close()
+        return True, ""
+    
+    def validate_and_open(self, pdf_bytes: bytes) -> Tuple[Optional[fitz.Document], str]:
+        """
+        PDFファイルの妥当性を検証し、開いたドキュメントを返す
+        
+        検証に使ったドキュメントをそのままprocess_pdfに渡すことで、
+        PDFのパースを1回で済ませる。呼び出し側でドキュメントを閉じること。
+        
+        Args:
+            pdf_bytes: PDFのバイト列
+            
+        Returns:
+            (開いたドキュメント, エラーメッセージ)。無効な場合ドキュメントはNone
+        """
         try:
             doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
-            if len(doc) == 0:
-                return False, "PDFにページが含まれていません"
-            
-            if len(doc) > 50:  # 最大50ページまで
-                return False, "PDFのページ数が多すぎます（最大50ページ）"
-            
-            doc.close()
-            return True, ""
-            
         except Exception as e:
-            return False, f"PDFファイルが破損しているか、形式が正しくありません: {e}"
\ No newline at end of file
+            return None, f"PDFファイルが破損しているか、形式が正しくありません: {e}"
+        
+        if len(doc) == 0:
+            doc.close()
+            return None, "PDFにページが含まれていません"
+        
+        if len(doc) > 50:  # 最大50ページまで
+            doc.close()
+            return None, "PDFのページ数が多すぎます（最大50ページ）"
+        
+        return doc, ""
@@ -0,0 +1,77 @@
+"""
+処理結果キャッシュモジュール
+同じPDF・同じ帯設定での再処理（プレビュー → 本番など）を省略するためのLRUキャッシュ
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+class BytesLRUCache:
+    """バイト列のLRUキャッシュ（件数とバイト数の両方で上限を設ける）"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._total_bytes = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """キャッシュされたバイト列を取得（なければNone）"""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: bytes) -> None:
+        """バイト列を登録し、上限を超えた分を古い順に破棄"""
+        # 1件で容量上限を超えるものはキャッシュしない
+        if len(value) > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._total_bytes -= len(previous)
+
+        self._entries[key] = value
+        self._total_bytes += len(value)
+
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= len(evicted)
+
+    def clear(self) -> None:
+        """すべてのエントリを破棄"""
+        self._entries.clear()
+        self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ProcessedPDFCache(BytesLRUCache):
+    """処理済みPDFのLRUキャッシュ"""
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024):
+        super().__init__(max_entries, max_bytes)
+
+    @staticmethod
+    def make_key(pdf_bytes: bytes,
+                 settings: Tuple[Hashable, ...],
+                 image_bytes: Optional[bytes] = None) -> Tuple:
+        """
+        キャッシュキーを作成
+
+        Args:
+            pdf_bytes: 元のPDFのバイト列
+            settings: 帯設定の値のタプル（既定値を補完済みのもの）
+            image_bytes: 置き換える画像のバイト列（オプション）
+
+        Returns:
+            (PDFのハッシュ, 帯設定, 画像のハッシュ)
+        """
+        pdf_digest = hashlib.blake2b(pdf_bytes, digest_size=16).digest()
+        image_digest = (
+            hashlib.blake2b(image_bytes, digest_size=16).digest() if image_bytes else None
+        )
+        return pdf_digest, settings, image_digest
@@ -34,6 +34,22 @@ class TestPDFProcessor:
         expected = 170.08 * 25.4 / 72
         assert abs(result - 60.0) < 0.1
     
+    def test_hex_to_rgb(self):
+        """16進数カラーコードのRGB変換テスト"""
+        from backend.app.pdf_processor import _hex_to_rgb
+        
+        assert _hex_to_rgb("#ff8000") == (255, 128, 0)
+        assert _hex_to_rgb("#0000FF") == (0, 0, 255)
+        assert _hex_to_rgb("#f80") == (255, 136, 0)
+        
+        # 16進数以外の形式はPILの色パーサーにフォールバック
+        assert _hex_to_rgb("red") == (255, 0, 0)
+        
+        # 16進数字以外を含むものは不正な色として扱う
+        for color in ("#-12", "#f_f", "# ffff0"):
+            with pytest.raises(ValueError):
+                _hex_to_rgb(color)
+    
     def test_create_band_image_basic(self):
         """基本的な帯画像生成テスト"""
         width, height = 400, 100
@@ -78,7 +94,38 @@ class TestPDFProcessor:
         # テキストが描画されているかの簡単なチェック
         # （実際のテキスト描画は複雑なので、画像サイズとモードのみ確認）
         
-    def test_create_sample_pdf(self):
+    def test_create_band_image_with_multiline_text_is_centered(self):
+        """改行を含むテキストが帯の中央に配置されることのテスト"""
+        from PIL import ImageOps
+        
+        width, height = 600, 180
+        img = self.processor.create_band_image(
+            width, height,
+            background_color="#ffffff",
+            text_content="line1\nline2 longer",
+            text_color="#000000"
+        )
+        
+        # 描画されたテキストの範囲の中心が帯の中心付近にあることを確認
+        left, top, right, bottom = ImageOps.invert(img.convert('L')).getbbox()
+        assert abs((left + right) / 2 - width / 2) <= 12
+        assert abs((top + bottom) / 2 - height / 2) <= 12
+        
+    def test_is_photographic(self):
+        """写真系画像の判定テスト"""
+        import numpy as np
+        from backend.app.pdf_processor import _is_photographic
+        
+        # 単色・テキストの帯は写真系と判定されない
+        flat = self.processor.create_band_image(400, 100, "#ffffff", "テスト", "#000000")
+        assert _is_photographic(flat) is False
+        
+        # 色数の多い画像は写真系と判定される
+        rng = np.random.default_rng(0)
+        noise = Image.fromarray(rng.integers(0, 256, (200, 400, 3), dtype=np.uint8), 'RGB')
+        assert _is_photographic(noise) is True
+    
+    def create_sample_pdf(self):
         """テスト用のサンプルPDFを作成"""
         import fitz
         
@@ -134,6 +181,34 @@ class TestPDFProcessor:
         assert is_valid is False
         assert "ページが含まれていません" in error_msg
     
+    def test_validate_and_open_reuses_document(self):
+        """検証で開いたドキュメントをそのまま処理に使えることのテスト"""
+        pdf_bytes = self.create_sample_pdf()
+        
+        doc, error_msg = self.processor.validate_and_open(pdf_bytes)
+        assert doc is not None
+        assert error_msg == ""
+        
+        try:
+            processed_pdf = self.processor.process_pdf(
+                pdf_bytes=pdf_bytes,
+                height_mm=30,
+                background_color="#0000ff",
+                doc=doc
+            )
+        finally:
+            doc.close()
+        
+        is_valid, _ = self.processor.validate_pdf(processed_pdf)
+        assert is_valid is True
+    
+    def test_validate_and_open_invalid(self):
+        """無効なデータではドキュメントが返されないことのテスト"""
+        doc, error_msg = self.processor.validate_and_open(b"This is not a PDF file")
+        
+        assert doc is None
+        assert "破損" in error_msg or "形式" in error_msg
+    
     def test_process_pdf_with_color_band(self):
         """色指定での帯置き換え処理テスト"""
         pdf_bytes = self.create_sample_pdf()
@@ -202,6 +277,27 @@ class TestPDFProcessor:
         is_valid, _ = self.processor.validate_pdf(processed_pdf)
         assert is_valid is True
     
+    def test_process_pdf_solid_color_band_without_image(self):
+        """単色の帯が画像を埋め込まずに塗りつぶされることのテスト"""
+        import fitz
+        
+        pdf_bytes = self.create_sample_pdf()
+        
+        processed_pdf = self.processor.process_pdf(
+            pdf_bytes=pdf_bytes,
+            height_mm=40,
+            background_color="#00ff00",
+        )
+        
+        doc = fitz.open(stream=processed_pdf, filetype="pdf")
+        page = doc.load_page(0)
+        
+        # 画像は埋め込まれず、帯エリアが指定色になっていることを確認
+        assert page.get_images() == []
+        pix = page.get_pixmap(clip=fitz.Rect(10, 10, 11, 11))
+        assert pix.pixel(0, 0) == (0, 255, 0)
+        doc.close()
+    
     def test_replace_band_with_uploaded_image_rgba(self):
         """RGBA画像での帯置き換えテスト"""
         pdf_bytes = self.create_sample_pdf()
@@ -224,6 +320,113 @@ class TestPDFProcessor:
         assert isinstance(processed_pdf, bytes)
         assert len(processed_pdf) > 0
 
+    def test_uploaded_rgba_image_is_flattened_on_white(self):
+        """RGBA画像が白背景に合成されて帯に埋め込まれることのテスト"""
+        import fitz
+        
+        pdf_bytes = self.create_sample_pdf()
+        
+        # 半透明の赤（アルファ128）のPNG画像を作成
+        test_image = Image.new('RGBA', (400, 100), color=(255, 0, 0, 128))
+        img_bytes = io.BytesIO()
+        test_image.save(img_bytes, format='PNG')
+        
+        processed_pdf = self.processor.replace_band_with_uploaded_image(
+            pdf_bytes=pdf_bytes,
+            image_bytes=img_bytes.getvalue(),
+            height_mm=40,
+        )
+        
+        # 白背景に50%の赤を合成した色になっていることを確認
+        doc = fitz.open(stream=processed_pdf, filetype="pdf")
+        pix = doc.load_page(0).get_pixmap(clip=fitz.Rect(10, 10, 11, 11))
+        assert pix.pixel(0, 0) == (255, 127, 127)
+        doc.close()
+    
+    def test_uploaded_jpeg_image_is_embedded_as_jpeg(self):
+        """JPEG画像が縮小デコードされ、JPEGのまま帯に埋め込まれることのテスト"""
+        import fitz
+        
+        pdf_bytes = self.create_sample_pdf()
+        
+        # 帯よりはるかに大きなJPEG画像を作成
+        test_image = Image.new('RGB', (4000, 1000), color=(0, 0, 255))
+        img_bytes = io.BytesIO()
+        test_image.save(img_bytes, format='JPEG')
+        
+        # 帯サイズ以上を保ったまま縮小してデコードされることを確認
+        band_image, source_format = self.processor._load_uploaded_image(
+            img_bytes.getvalue(), (595, 113)
+        )
+        assert source_format == 'JPEG'
+        assert 595 <= band_image.width < 4000
+        assert band_image.height >= 113
+        
+        processed_pdf = self.processor.replace_band_with_uploaded_image(
+            pdf_bytes=pdf_bytes,
+            image_bytes=img_bytes.getvalue(),
+            height_mm=40,
+        )
+        
+        # 帯サイズのJPEGとして埋め込まれていることを確認
+        doc = fitz.open(stream=processed_pdf, filetype="pdf")
+        page = doc.load_page(0)
+        images = page.get_images()
+        assert len(images) == 1
+        embedded = doc.extract_image(images[0][0])
+        assert embedded["ext"] == "jpeg"
+        assert embedded["width"] == 595
+        
+        pixel = page.get_pixmap(clip=fitz.Rect(10, 10, 11, 11)).pixel(0, 0)
+        assert pixel[0] < 16 and pixel[1] < 16 and pixel[2] > 240
+        doc.close()
+    
+    def test_process_pdf_multi_page(self):
+        """複数ページPDFの帯置き換えでページ順と目次が保持されることのテスト"""
+        import fitz
+        
+        # 目次付きの5ページのPDFを作成
+        doc = fitz.open()
+        for i in range(5):
+            page = doc.new_page(width=595, height=842)
+            page.insert_text((50, 400), f"page {i}", fontsize=12)
+        doc.set_toc([[1, f"Chapter {i}", i + 1] for i in range(5)])
+        pdf_bytes = doc.tobytes()
+        doc.close()
+        
+        processed_pdf = self.processor.process_pdf(
+            pdf_bytes=pdf_bytes,
+            height_mm=60,
+            background_color="#ff0000",
+            text_content="複数ページ",
+        )
+        
+        # ページ数と順序が保持されていることを確認
+        doc = fitz.open(stream=processed_pdf, filetype="pdf")
+        assert len(doc) == 5
+        for i, page in enumerate(doc):
+            assert f"page {i}" in page.get_text()
+            # 帯が描画されていることを確認（左上の角は背景色）
+            assert page.get_pixmap(clip=fitz.Rect(5, 5, 6, 6)).pixel(0, 0) == (255, 0, 0)
+        
+        # 目次とその参照先ページが保持されていることを確認
+        assert doc.get_toc() == [[1, f"Chapter {i}", i + 1] for i in range(5)]
+        doc.close()
+
+    def test_render_band_rgb_is_cached(self):
+        """同じ設定の帯画像がキャッシュから再利用されることのテスト"""
+        from backend.app.pdf_processor import _band_rgb_cache, _render_band_rgb
+        
+        _band_rgb_cache.clear()
+        first = _render_band_rgb(400, 100, "#ffffff", "キャッシュ", "#000000")
+        second = _render_band_rgb(400, 100, "#ffffff", "キャッシュ", "#000000")
+        
+        assert first is second
+        assert len(_band_rgb_cache) == 1
+        
+        # Pixmapにそのまま渡せる生のRGBバイト列であることを確認
+        assert len(first) == 400 * 100 * 3
+
 @pytest.fixture
 def sample_pdf_path():
     """テスト用のサンプルPDFファイルパスを提供"""
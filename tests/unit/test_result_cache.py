@@ -0,0 +1,53 @@
+"""
+処理結果キャッシュモジュールのユニットテスト
+"""
+from backend.app.result_cache import ProcessedPDFCache
+
+class TestProcessedPDFCache:
+    """ProcessedPDFCacheクラスのテストスイート"""
+
+    def test_make_key_depends_on_all_inputs(self):
+        """PDF・設定・画像のいずれかが異なればキーが変わることのテスト"""
+        settings = (60.0, 0.0, "#ffffff", None, "#000000")
+        key = ProcessedPDFCache.make_key(b"pdf", settings)
+
+        assert key == ProcessedPDFCache.make_key(b"pdf", settings)
+        assert key != ProcessedPDFCache.make_key(b"other", settings)
+        assert key != ProcessedPDFCache.make_key(b"pdf", (40.0,) + settings[1:])
+        assert key != ProcessedPDFCache.make_key(b"pdf", settings, b"image")
+
+    def test_get_and_put(self):
+        """登録した処理結果を取得できることのテスト"""
+        cache = ProcessedPDFCache()
+
+        assert cache.get(("a",)) is None
+        cache.put(("a",), b"output")
+        assert cache.get(("a",)) == b"output"
+
+    def test_evicts_least_recently_used_by_count(self):
+        """件数上限を超えると最も古く使われたものが破棄されることのテスト"""
+        cache = ProcessedPDFCache(max_entries=2)
+        cache.put(("a",), b"1")
+        cache.put(("b",), b"2")
+
+        # aを参照して最近使用済みにする
+        cache.get(("a",))
+        cache.put(("c",), b"3")
+
+        assert cache.get(("a",)) == b"1"
+        assert cache.get(("b",)) is None
+        assert cache.get(("c",)) == b"3"
+
+    def test_evicts_by_total_bytes(self):
+        """バイト数上限を超えると古いものから破棄されることのテスト"""
+        cache = ProcessedPDFCache(max_bytes=10)
+        cache.put(("a",), b"x" * 6)
+        cache.put(("b",), b"x" * 6)
+
+        assert cache.get(("a",)) is None
+        assert len(cache) == 1
+
+        # 単体で上限を超える結果はキャッシュしない
+        cache.put(("c",), b"x" * 11)
+        assert cache.get(("c",)) is None
+        assert cache.get(("b",)) == b"x" * 6